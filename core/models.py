@@ -1,57 +1,272 @@
 import logging
 import os
-# import numpy as np
-from util import init_logger, validate_arg
+import types
+import numpy as np
+from util import init_logger, validate_arg, make_validator
+from montecarlo import ParamArena, get_rng, DIST_CODES, DIST_NONE, DIST_UNIFORM, PTYPE_CODES, PTYPE_PERCENT
+
+# simulation mode codes
+MODE_NOM = 0
+MODE_MC = 1
+MODE_CODES = {'nom': MODE_NOM, 'mc': MODE_MC}
+
+# allow-lists for argument validation
+_VALID_MODES = frozenset(MODE_CODES)
+_VALID_PARAM_TYPES = frozenset(('value', 'percent'))
+_VALID_PARAM_DISTS = frozenset(('uniform', 'normal'))
+
+# constructor argument validation can be disabled with 'python -O' or FIREFLY_VALIDATE=0
+_VALIDATE = __debug__ and os.environ.get('FIREFLY_VALIDATE', '1') == '1'
+
+if _VALIDATE:
+    _va = validate_arg
+    _validate_mode = make_validator(str, _VALID_MODES)
+else:
+    def _va(arg, expected_type, valid_values=None, optional=False, default=None, strict=False):
+        """
+        No-op stand-in for validate_arg() when validation is disabled.  Only resolves optional defaults
+        """
+        return default if arg is None else arg
+
+    def _validate_mode(arg):
+        return arg
+
+
+def _sample_value(nom:float, low:[int, float], high:[int, float], dist_code:int, ptype_code:int):
+    """
+    Draw a single Monte Carlo sample from primitive parameter statistics.  Scalar counterpart of
+    montecarlo.sample_trial(): 'percent' bounds are the percent deviation below/above nominal and normal
+    distributions span the bounds with +/- 3 sigma
+
+    Args:
+        nom (float): nominal value
+        low (int, float): lower bound as represented by ptype_code (None if undefined)
+        high (int, float): upper bound as represented by ptype_code (None if undefined)
+        dist_code (int): distribution code (montecarlo.DIST_*)
+        ptype_code (int): parameter type code (montecarlo.PTYPE_*)
+
+    Returns:
+        val (float): sampled value, or the nominal value if no distribution is defined
+    """
+    if dist_code == DIST_NONE or low is None or high is None:
+        return nom
+    if ptype_code == PTYPE_PERCENT:
+        # deviation is taken from the magnitude of nominal, so negative rails still have low <= high
+        mag = abs(nom)
+        low = nom - mag * (low / 100.0)
+        high = nom + mag * (high / 100.0)
+    if dist_code == DIST_UNIFORM:
+        return float(get_rng().uniform(low, high))
+    return float(get_rng().normal(nom, (high - low) / 6.0))
+
+
+class _ParamBase():
+    """
+    Value accessors and arithmetic operators shared by StatParam and _DerivedStatParam.  Subclasses provide 'name',
+    '_nom_value' and _sample().  Combining a parameter with a number returns a _DerivedStatParam, which is kept in the
+    affine form root * scale + offset of the underlying StatParam, so Monte Carlo samples of the root propagate through
+    the expression
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return "{}-{}".format(self.name, self.nom_value)
+
+    @property
+    def nom_value(self):
+        return self._nom_value
+
+    def get_value(self, mode='nom'):
+        """
+        Get the value of the parameter.
+
+        Args:
+            mode (str): [nom, mc]. Returns nominal value or random value within defined distribution
+
+        Returns:
+            val (float): value
+        """
+        return self._nom_value if mode == 'nom' else self._sample()
+
+    def get_nom(self):
+        """
+        Get the nominal value of the parameter without any mode dispatch
+
+        Returns:
+            val (float): nominal value
+        """
+        return self._nom_value
 
+    def get_mc(self):
+        """
+        Get a random value of the parameter within its defined distribution
+
+        Returns:
+            val (float): sampled value
+        """
+        return self._sample()
+
+    def _sample(self):
+        raise NotImplementedError
+
+    def _affine(self):
+        """
+        Returns:
+            (root, scale, offset) (tuple): affine form of the parameter value over its root StatParam
+        """
+        return self, 1.0, 0.0
+
+    def __truediv__(self, other):
+        if type(other) not in (int, float):
+            return NotImplemented
+        root, scale, offset = self._affine()
+        return _DerivedStatParam(root, scale / other, offset / other, "({}/{})".format(self.name, other), self.units)
+
+    def __mul__(self, other):
+        if type(other) not in (int, float):
+            return NotImplemented
+        root, scale, offset = self._affine()
+        return _DerivedStatParam(root, scale * other, offset * other, "({}*{})".format(self.name, other), self.units)
+
+    def __add__(self, other):
+        if type(other) not in (int, float):
+            return NotImplemented
+        root, scale, offset = self._affine()
+        return _DerivedStatParam(root, scale, offset + other, "({}+{})".format(self.name, other), self.units)
 
-class StatParam():
+    __rmul__ = __mul__
+    __radd__ = __add__
+
+
+class StatParam(_ParamBase):
     """
-    class to model parameter statistics.  Modeling parameters in this way allows us to run Monte Carlo analysis
+    class to model parameter statistics.  Modeling parameters in this way allows us to run Monte Carlo analysis.
+    The statistics are read-only once constructed, so a copy in a ParamArena can't disagree with the parameter
     """
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ('name', 'units', '_nom_value', '_param_type', '_param_dist', '_low_val', '_high_val', '_dist_code', '_ptype_code')
+
     def __init__(self, name:str, units:str, nom_value:[int, float], param_type:str=None, param_dist:str=None, low_val:[int,float]=None, high_val:[int,float]=None):
         """
         Args:
             name (str): Name of the parameter
             units (str): Units of the parameter
-            nom_value (int, float): Nominal value of the parameter
+            nom_value (int, float): Nominal value of the parameter.  Stored as a float
             param_type (str): Type of statistical parameter ['value', 'percent']
             param_dist (str): Type of statistical distribution to use ['uniform', 'normal']
             low_val (int, float): Lower value as represented by param_type
             high_val (int, float): Upper value as represented by param_type
         """
-        self.logger = logging.getLogger(self.__class__.__name__)
         # required arguments
-        self.name = validate_arg(name, str)
-        self.units = validate_arg(units, str)
-        self.nom_value = validate_arg(nom_value, [int, float])
+        self.name = _va(name, str)
+        self.units = _va(units, str)
+        self._nom_value = float(_va(nom_value, [int, float]))     # always float so NumPy ops stay on the float64 fast path
         # optional arguments
-        self.param_type = validate_arg(param_type, str, valid_values=['value', 'percent'], optional=True)
-        self.param_dist = validate_arg(param_dist, str, valid_values=['uniform','normal'], optional=True)
-        self.low_val = validate_arg(low_val, [int,float], optional=True)
-        self.high_val = validate_arg(high_val, [int,float], optional=True)
+        # names are validated case-insensitively and stored lowercase, so the code lookups below always match
+        param_type = _va(param_type, str, valid_values=_VALID_PARAM_TYPES, optional=True)
+        param_dist = _va(param_dist, str, valid_values=_VALID_PARAM_DISTS, optional=True)
+        self._param_type = None if param_type is None else param_type.lower()
+        self._param_dist = None if param_dist is None else param_dist.lower()
+        self._low_val = _va(low_val, [int,float], optional=True)
+        self._high_val = _va(high_val, [int,float], optional=True)
+        self._dist_code = DIST_CODES[self._param_dist]
+        self._ptype_code = PTYPE_CODES[self._param_type]
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Creating new StatParam (%s)", self.name)
+
+    @property
+    def param_type(self):
+        return self._param_type
+
+    @property
+    def param_dist(self):
+        return self._param_dist
+
+    @property
+    def low_val(self):
+        return self._low_val
+
+    @property
+    def high_val(self):
+        return self._high_val
+
+    def _sample(self):
+        """
+        Draw a single random value from the parameter distribution
 
-        self.logger.debug("Creating new StatParam ({})".format(self.name))
+        Returns:
+            val (float): sampled value, or the nominal value if no distribution is defined
+        """
+        return _sample_value(self._nom_value, self._low_val, self._high_val, self._dist_code, self._ptype_code)
 
-        def __repr__(self):
-            return "{}-{}".format(self.name, self.nom_value)
 
-        def get_value(self, mode='nom'):
-            """
-            Get the value of the parameter.
+class _DerivedStatParam(_ParamBase):
+    """
+    Parameter derived from a StatParam by arithmetic with numbers (i.e. StatParam / 2.0), stored as
+    root * scale + offset.  It doesn't register in a ParamArena itself; ModelGraph evaluates it from the sample of its
+    root, so within a Monte Carlo trial it is fully correlated with the root.
 
-            Args:
-                mode (str): [nom, mc]. Returns nominal value or random value within defined distribution
+    The scalar get_mc() draws a fresh sample of the root on every call, so values from separate get_mc() calls on the
+    root and the derived parameter are uncorrelated.  Use ModelGraph.value() for correlated values
+    """
+    __slots__ = ('name', 'units', '_nom_value', 'root', 'scale', 'offset')
+
+    def __init__(self, root:StatParam, scale:float, offset:float, name:str, units:str):
+        """
+        Args:
+            root (StatParam): parameter the value is derived from
+            scale (float): factor applied to the root value
+            offset (float): offset added after scaling
+            name (str): display name of the expression
+            units (str): units of the parameter
+        """
+        self.root = root
+        self.scale = float(scale)
+        self.offset = float(offset)
+        self.name = name
+        self.units = units
+        self._nom_value = root.get_nom() * self.scale + self.offset
+
+    def _affine(self):
+        return self.root, self.scale, self.offset
+
+    def _sample(self):
+        return self.root.get_mc() * self.scale + self.offset
+
+
+
+class _FrozenStatParam(StatParam):
+    """
+    StatParam used for the shared module-level defaults.  Unlike a plain StatParam, the name and units can't be changed
+    either, since every model that falls back on the default holds the same object
+    """
+    __slots__ = ('_frozen',)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError("Shared default StatParam ({}) is read-only".format(self.name))
+        super().__setattr__(name, value)
+
+
+# shared defaults for optional model parameters
+_ZERO_INPUT_R = _FrozenStatParam('input_resistance', 'Ohm', 0.0)
+_ZERO_OUTPUT_R = _FrozenStatParam('output_resistance', 'Ohm', 0.0)
+_ZERO_VDROP = _FrozenStatParam('Vdropout', 'V', 0.0)
+_ZERO_IQ = _FrozenStatParam('iq', 'uA', 0.0)
 
-            Returns:
-                val (int, float): value
-            """
-            # just always return nominal value for now
-            return self.nom_value
 
 class BaseModel():
     """
     Base model class template.  All models should inherit from here
     """
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ('id', 'name', 'sub_system_id', 'tags', 'mode', '_mode_code')
+
     def __init__(self, id:int, name:str, tags:dict=None, sub_system_id:int=None, mode:str='nom'):
         """
         Args:
@@ -62,19 +277,32 @@ class BaseModel():
             sub_system_id (int): Sub-system id that the model belongs to
             mode (str): Simulation mode: nom (nominal values), mc (monte carlo)
         """
-        self.logger = logging.getLogger(self.__class__.__name__)
-        self.id = validate_arg(id, int)
-        self.name = validate_arg(name, str)
-        self.sub_system_id = validate_arg(sub_system_id, int, optional=True)
-        self.tags = validate_arg(tags, dict, optional=True)
-        self.mode = validate_arg(mode, str, ['nom', 'mc'])       
+        self.id = _va(id, int)
+        self.name = _va(name, str)
+        self.sub_system_id = _va(sub_system_id, int, optional=True)
+        self.tags = _va(tags, dict, optional=True)
+        # the mode is validated case-insensitively and stored lowercase, so the code lookup always matches
+        self.mode = _validate_mode(mode).lower()
+        self._mode_code = MODE_CODES[self.mode]
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Creating new model object: %s", self.name)
+
+    def params(self):
+        """
+        Get the statistical parameters of the model, including those of any child models
 
-        self.logger.debug("Creating new model object: {}".format(self.name))
+        Returns:
+            params (list): list of StatParam (or derived parameter) objects
+        """
+        return list()
 
 class BaseLoad(BaseModel):
     """
     Base load class
     """
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ('load_value', 'input_resistance')
 
     def __init__(self, id:int, name:str, load_value:StatParam, input_resistance:StatParam=None, tags:dict=None, sub_system_id:str=None, mode:str='nom'):
         """
@@ -89,9 +317,11 @@ class BaseLoad(BaseModel):
             mode (str): Simulation mode: nom (nominal values), mc (monte carlo)
         """
         super().__init__(id, name, tags, sub_system_id, mode)
-        self.load_value = validate_arg(load_value, StatParam)      
-        self.input_resistance = validate_arg(input_resistance, StatParam, optional=True, default=StatParam('input_resistance', 'Ohm', 0.0))
-        
+        self.load_value = _va(load_value, StatParam)      
+        self.input_resistance = _ZERO_INPUT_R if input_resistance is None else _va(input_resistance, StatParam)
+
+    def params(self):
+        return [self.load_value, self.input_resistance]
 
 
 class ResistiveLoad(BaseLoad):
@@ -99,36 +329,34 @@ class ResistiveLoad(BaseLoad):
     This class models a typical resistive load.  The current through the load is a function of the load resistance and the input voltage.
     The ResistiveLoad model can be defined as having a specified current load or more directly the load resistance.
     """
-    def __init__(self, *args):
-        """
-        * see base class for argument list *
-        """
-        super().__init__(*args)
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ()
 
 class ConstantCurrentLoad(BaseLoad):
     """
     This class models a typical constant current load.  The current consumption by the load is independent from the input voltage
     """
-    def __init__(self, *args):
-        """
-        * see base class for argument list *
-        """
-        super().__init__(*args)
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ()
 
 class ConstantPowerLoad(BaseLoad):
     """
     This class models a typical constant power load.  The current consumed by the load is a function of the input voltage such that the power dissipated by the load is constant.
     """
-    def __init__(self, *args):
-        """
-        * see base class for argument list *
-        """
-        super().__init__(*args)
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ()
 
 class LoadSwitch(BaseModel):
     """
     This class models a load switch.  It can contain a collection of underlying load models
     """
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ('switch_resistance', 'input_resistance', 'output_resistance', '_loads_list', '_id_to_idx', '_loads_by_id',
+                 '_child_loads', '_flat_loads', '_subtree_id_map', '_index_version')
+
+    # bumped whenever any load switch gains or loses a child, so cached subtree indexes of parent switches are invalidated too
+    _topology_version = 0
+
     def __init__(self, id:int, name:str, switch_resistance:StatParam, input_resistance:StatParam=None, output_resistance:StatParam=None, tags=None, sub_system_id=None, child_loads:dict=None):
         """
         Args:
@@ -141,33 +369,142 @@ class LoadSwitch(BaseModel):
             *args: See BaseModel documentation for additional arguments
         """
         super().__init__(id, name, tags, sub_system_id)
-        self.switch_resistance = validate_arg(switch_resistance, StatParam)
-        self.input_resistance = validate_arg(input_resistance, StatParam, optional=True, default=StatParam('input_resistance', 'Ohm', 0))
-        self.output_resistance = validate_arg(output_resistance, StatParam, optional=True, default=StatParam('output_resistance', 'Ohm', 0))
-        self.child_loads = validate_arg(child_loads, dict, optional=True, default=dict())
+        self.switch_resistance = _va(switch_resistance, StatParam)
+        self.input_resistance = _ZERO_INPUT_R if input_resistance is None else _va(input_resistance, StatParam)
+        self.output_resistance = _ZERO_OUTPUT_R if output_resistance is None else _va(output_resistance, StatParam)
+
+        # child loads are kept in a flat list for traversal, with id->index and id->load maps for lookups
+        self._loads_list = list()
+        self._id_to_idx = dict()
+        self._loads_by_id = dict()
+        self._child_loads = types.MappingProxyType(self._loads_by_id)
+        self._flat_loads = None
+        self._subtree_id_map = None
+        self._index_version = -1
+        if child_loads is not None:
+            for load_obj in _va(child_loads, dict).values():
+                self.add_load(load_obj)
+
+    @property
+    def child_loads(self):
+        """
+        Read-only mapping of child load objects keyed by load 'id'.  Use add_load() and remove_load() to modify the children
+        """
+        return self._child_loads
 
     def add_load(self, load_obj):
         """
-        Method to add a child load to the load switch model.  The 'child_loads' dictionary hosts all child load objects and 
-        this method will add a new key/val pair.  The child loads are stored by the 'id' of the load object and the value is the object itself.
+        Method to add a child load to the load switch model.  The child loads are stored in insertion order and indexed by the 'id'
+        of the load object.  Adding a load with an existing 'id' replaces the previous load object.
 
         Args:
             load_obj (obj): Load object that inherits from BaseLoad or is another loadSwitch object
         """
-        self.child_loads[load_obj.id] = load_obj
-        self.logger.debug("Adding load [{}-{}] to LoadSwitch [{}-{}]".format(load_obj.id, load_obj.name, self.id, self.name))
+        idx = self._id_to_idx.get(load_obj.id)
+        if idx is None:
+            self._id_to_idx[load_obj.id] = len(self._loads_list)
+            self._loads_list.append(load_obj)
+        else:
+            self._loads_list[idx] = load_obj
+        self._loads_by_id[load_obj.id] = load_obj
+        self._flat_loads = None
+        LoadSwitch._topology_version += 1
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Adding load [%d-%s] to LoadSwitch [%d-%s]", load_obj.id, load_obj.name, self.id, self.name)
+
+    def remove_load(self, load_id:int):
+        """
+        Method to remove a child load from the load switch model
+
+        Args:
+            load_id (int): id of the child load
+
+        Returns:
+            load_obj (obj): the removed load object
+        """
+        if load_id not in self._id_to_idx:
+            raise KeyError("LoadSwitch [{}-{}] has no child load with id {}".format(self.id, self.name, load_id))
+        idx = self._id_to_idx.pop(load_id)
+        load_obj = self._loads_by_id.pop(load_id)
+        del self._loads_list[idx]
+        # loads after the removed one shift down by one
+        for other in self._loads_list[idx:]:
+            self._id_to_idx[other.id] -= 1
+        self._flat_loads = None
+        LoadSwitch._topology_version += 1
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Removing load [%d-%s] from LoadSwitch [%d-%s]", load_obj.id, load_obj.name, self.id, self.name)
+        return load_obj
+
+    def build_index(self):
+        """
+        Walk the load tree below this switch once (depth first) and cache the result.  '_flat_loads' holds every descendant
+        load that isn't a LoadSwitch and '_subtree_id_map' maps the 'id' of every descendant (including nested switches) to its object
+        """
+        flat_loads = list()
+        subtree_id_map = dict()
+        stack = list(reversed(self._loads_list))
+        while stack:
+            load_obj = stack.pop()
+            subtree_id_map[load_obj.id] = load_obj
+            if isinstance(load_obj, LoadSwitch):
+                stack.extend(reversed(load_obj._loads_list))
+            else:
+                flat_loads.append(load_obj)
+        self._flat_loads = flat_loads
+        self._subtree_id_map = subtree_id_map
+        self._index_version = LoadSwitch._topology_version
+
+    def _check_index(self):
+        """
+        Rebuild the cached subtree index if the load tree changed since it was built
+        """
+        if self._flat_loads is None or self._index_version != LoadSwitch._topology_version:
+            self.build_index()
+
+    def iter_flat_loads(self):
+        """
+        Iterate over every load below this switch (nested load switches are expanded, depth first)
+
+        Returns:
+            loads (iterator): iterator of load objects
+        """
+        self._check_index()
+        return iter(self._flat_loads)
+
+    def find_load(self, load_id:int):
+        """
+        Look up a load anywhere below this switch by its 'id'
+
+        Args:
+            load_id (int): id of the load
+
+        Returns:
+            load_obj (obj): load object, or None if the id isn't in this subtree
+        """
+        self._check_index()
+        return self._subtree_id_map.get(load_id)
+
+    def params(self):
+        params = [self.switch_resistance, self.input_resistance, self.output_resistance]
+        for load_obj in self._loads_list:
+            params.extend(load_obj.params())
+        return params
 
 class BaseSource(BaseModel):
     """
     BaseSource model
     """
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ('vin', 'vout', 'max_current', 'input_resistance', 'output_resistance', 'loads', 'total_current', 'power_dissipation', 'efficiency')
+
     def __init__(self, id:int, name:str, vin:StatParam, vout:StatParam, max_current:StatParam, input_resistance:StatParam=None, output_resistance:StatParam=None, tags:dict=None, sub_system_id:str=None, mode:str='nom'):
         """
         Args:
             id (int): id number for internal use only
             name (str): display name for the load
             vin (StatParam): Source voltage input
-            vout (StatParam): Regulated source voltage output
+            vout (StatParam): Regulated source voltage output.  May also be derived from another parameter (i.e. vin / divider)
             max_current (StatParam): Maximum output current at rated voltage
             input_resistance (StatParam): input resistance of the source (i.e a series component prior to the input pin)
             output_resistance (StatParam): output resistance of the source (i.e a series component at to the Vout pin)
@@ -177,22 +514,24 @@ class BaseSource(BaseModel):
             mode (str): Simulation mode: nom (nominal values), mc (monte carlo)
         """
         super().__init__(id, name, tags, sub_system_id, mode)
-        self.vin = validate_arg(vin, StatParam)
-        self.vout = validate_arg(vout, StatParam)
-        self.max_current = validate_arg(max_current, StatParam)
-
-        # optional arg defaults
-        default_input = StatParam('input_resistance', 'Ohm', 0)
-        default_output = StatParam('output_resistance', 'Ohm', 0)
+        self.vin = _va(vin, StatParam)
+        self.vout = _va(vout, [StatParam, _DerivedStatParam])
+        self.max_current = _va(max_current, StatParam)
 
-        self.input_resistance = validate_arg(input_resistance, StatParam, optional=True, default=default_input)
-        self.output_resistance = validate_arg(output_resistance, StatParam, optional=True, default=default_output)
+        self.input_resistance = _ZERO_INPUT_R if input_resistance is None else _va(input_resistance, StatParam)
+        self.output_resistance = _ZERO_OUTPUT_R if output_resistance is None else _va(output_resistance, StatParam)
 
         # attributes
         self.loads = list()     # loads that are fed from this voltage source
         self.total_current = float()    # total load current supplied by the source
         self.power_dissipation = float()    # attribute to hold power dissipated into this source
 
+    def params(self):
+        params = [self.vin, self.vout, self.max_current, self.input_resistance, self.output_resistance]
+        for load_obj in self.loads:
+            params.extend(load_obj.params())
+        return params
+
     def calc_efficiency(self, current=None):
         """
         Calculate the efficiency of the source based on the load current.  If the current if NoneType, the method will use the
@@ -222,12 +561,24 @@ class EfficiencyModel():
             efficiency (float, list): list of floats that represent the efficiency in decimal form (ie 0.1 = 10%)
             current (list): list of floats that represent current in Amps
         """
-        self.efficiency = validate_arg(efficiency, [float, list])
-        self.current = validate_arg(current, list, optional=True)
+        self.efficiency = _va(efficiency, [float, list])
+        self.current = _va(current, list, optional=True)
+        self._is_scalar = not isinstance(self.efficiency, list)
+
+        # lookup tables for the interpolated mode, sorted by current
+        self._i = None
+        self._eff = None
+        if not self._is_scalar:
+            if self.current is None or len(self.current) != len(self.efficiency):
+                raise ValueError("Efficiency list must map 1:1 to a list of current values")
+            order = np.argsort(self.current)
+            self._i = np.ascontiguousarray(np.asarray(self.current, dtype=np.float64)[order])
+            self._eff = np.ascontiguousarray(np.asarray(self.efficiency, dtype=np.float64)[order])
 
     def get_eff(self, current=None):
         """
-        Get the efficiency value for a particular load current
+        Get the efficiency value for a particular load current.  Currents between table entries are linearly interpolated
+        and currents outside the table are clamped to the first/last efficiency value
 
         Args:
             current (float): Load current in Amps
@@ -235,19 +586,36 @@ class EfficiencyModel():
         Returns:
             eff (float): Efficiency value in decimal form
         """
-        if type(self.efficiency) is float:
+        if self._is_scalar:
             # efficiency is defined as single value, so current doens't matter
             return self.efficiency
-        else:
-            current = validate_arg(current, [float, int])   # at this point current arg is no longer optional
-            # TODO use linear interpolation to find the closest efficiency value to the requested current value
-            return eff
+        if current is None:
+            # np.interp would quietly return nan
+            raise TypeError("Invalid argument type ({}) must be ([<class 'float'>, <class 'int'>])".format(type(current)))
+        return float(np.interp(current, self._i, self._eff))
+
+    def get_eff_batch(self, currents):
+        """
+        Get the efficiency values for an array of load currents (i.e. one current per Monte Carlo trial)
+
+        Args:
+            currents (np.ndarray): Load currents in Amps
+
+        Returns:
+            eff (np.ndarray): Efficiency values in decimal form
+        """
+        if self._is_scalar:
+            return np.full(np.shape(currents), self.efficiency, dtype=np.float64)
+        return np.interp(currents, self._i, self._eff)
 
 
 class SMPSSource(BaseSource):
     """
     This class models any type of Switch-Mode power supply (Buck, Boost, BuckBoost, SEPIC, etc)
     """
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ()
+
     def __init__(self, id:int, name:str, vin:StatParam, vout:StatParam, max_current:StatParam, input_resistance:StatParam=None, output_resistance:StatParam=None, tags:dict=None, sub_system_id:str=None, efficiency:EfficiencyModel=None):
         """
         Args:
@@ -263,14 +631,17 @@ class SMPSSource(BaseSource):
                 is 2 keys: 'enabled' and 'disabled'.  The values for both keys are lists of 'tag' strings.
             efficiency (EfficiencyModel): Efficiency object for this converter
         """
-        super().__init__(int, name, vin, vout, max_current, input_resistance, output_resistance, tags, sub_system_id)
-        self.efficiency = validate_arg(efficiency, EfficiencyModel)
+        super().__init__(id, name, vin, vout, max_current, input_resistance, output_resistance, tags, sub_system_id)
+        self.efficiency = _va(efficiency, EfficiencyModel)
 
 class CapDividerSource(BaseSource):
     """
     Class to model a Capacitive Divider source
     """
-def __init__(self, id:int, name:str, vin:StatParam, divider:int, max_current:StatParam, input_resistance:StatParam=None, output_resistance:StatParam=None, tags:dict=None, sub_system_id:str=None, efficiency:EfficiencyModel=None):
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ('divider',)
+
+    def __init__(self, id:int, name:str, vin:StatParam, divider:int, max_current:StatParam, input_resistance:StatParam=None, output_resistance:StatParam=None, tags:dict=None, sub_system_id:str=None, efficiency:EfficiencyModel=None):
         """
         Args:
             id (int): id number for internal use only
@@ -286,16 +657,19 @@ def __init__(self, id:int, name:str, vin:StatParam, divider:int, max_current:Sta
             efficiency (EfficiencyModel): Efficiency object for this converter
         """
         # first, calculate the nominal voltage output to pass into the base model 
-        _vin = validate_arg(vin, StatParam)
-        self.divider = validate_arg(divider, int)
+        _vin = _va(vin, StatParam)
+        self.divider = _va(divider, int)
         vout = _vin / float(self.divider)
-        super().__init__(int, name, vin, vout, max_current, input_resistance, output_resistance, tags, sub_system_id)
-        self.efficiency = validate_arg(efficiency, EfficiencyModel)
+        super().__init__(id, name, vin, vout, max_current, input_resistance, output_resistance, tags, sub_system_id)
+        self.efficiency = _va(efficiency, EfficiencyModel)
 
 class LinearSource(BaseSource):
     """
     Class to model a linear voltage regulator
     """
+    logger = logging.getLogger(__qualname__)
+    __slots__ = ('vdropout', 'iq', '_iq_nom')
+
     def __init__(self, id:int, name:str, vin:StatParam, vout:StatParam, max_current:StatParam, input_resistance:StatParam=None, output_resistance:StatParam=None, tags:dict=None, sub_system_id:str=None, vdropout:StatParam=None, iq:StatParam=None):
             """
             Args:
@@ -312,30 +686,199 @@ class LinearSource(BaseSource):
                 vdropout (StatParam): Dropout voltage of the regulator in volts
                 iq (StatParam): Quiescent current of the regulator in microvolts (uV)
             """
-            super().__init__(int, name, vin, vout, max_current, input_resistance, output_resistance, tags, sub_system_id)
-            self.vdroput = validate_arg(vdropout, StatParam, optional=True, default=StatParam('Vdroput', 'V', 0))
-            self.iq = validate_arg(iq, StatParam, optional=True, default=StatParam('iq', 'uA', 0))
+            super().__init__(id, name, vin, vout, max_current, input_resistance, output_resistance, tags, sub_system_id)
+            self.vdropout = _ZERO_VDROP if vdropout is None else _va(vdropout, StatParam)
+            self.iq = _ZERO_IQ if iq is None else _va(iq, StatParam)
+            self._iq_nom = self.iq.get_value('nom')
             self.efficiency = None
 
+    def params(self):
+        params = super().params()
+        params.extend((self.vdropout, self.iq))
+        return params
+
     def calc_efficiency(self, current=None):
         """
         Calculate the efficiency of the source based on the load current.  If the current if NoneType, the method will use the
-        stored total load current attribute
+        stored total load current attribute.  The input voltage cancels out of (vin * I) / (vin * (I + iq)), so only the
+        quiescent current is needed
 
         Args:
-            current (float): load current in Amps
+            current (float, np.ndarray): load current in Amps.  An array of currents is evaluated element-wise
 
         Returns:
-            eff (float): Converter efficiency in decimal form
+            eff (float, np.ndarray): Converter efficiency in decimal form
         """
-        if current is None:
-            current = self.total_current
+        c = self.total_current if current is None else current
+        iq = self._iq_nom if self._mode_code == MODE_NOM else self.iq.get_mc()
+        return c / (c + iq)
+
+    def calc_efficiency_batch(self, currents):
+        """
+        Calculate the nominal efficiency of the source for an array of load currents (i.e. one current per Monte Carlo trial)
+
+        Args:
+            currents (np.ndarray): load currents in Amps
+
+        Returns:
+            eff (np.ndarray): Converter efficiency in decimal form
+        """
+        return currents / (currents + self._iq_nom)
 
-        vin = self.vin.get_value(self.mode)
-        iq = self.iq.get_value(self.mode)
-        eff = (vin * current) / (vin * (current + iq))
 
-        return eff
+def _param_expr(param, arena:ParamArena):
+    """
+    Build the source expression that reads a parameter from a 'samples' array, for code generated by ModelGraph.compile()
+
+    Args:
+        param (StatParam, _DerivedStatParam): parameter registered in the arena
+        arena (ParamArena): arena the 'samples' array is indexed by
+
+    Returns:
+        expr (str): python expression
+    """
+    if isinstance(param, _DerivedStatParam):
+        return "(samples[{}] * {!r} + {!r})".format(arena.index(param.root), param.scale, param.offset)
+    return "samples[{}]".format(arena.index(param))
+
+
+class ModelGraph():
+    """
+    Collection of the sources that make up a power tree.  The graph owns the ParamArena of its parameters, which is
+    built from the models once the topology is complete.  compile() then generates a single flat function that evaluates
+    the efficiency of every source with all parameter indices baked in as constants
+    """
+    logger = logging.getLogger(__qualname__)
+
+    def __init__(self, sources:list=None):
+        """
+        Args:
+            sources (list): Initial list of source objects.  Sources can be added after __init__
+        """
+        self.sources = list()
+        self.arena = None
+        self._eval = None
+        self._eval_src = None
+        if sources is not None:
+            for source in _va(sources, list):
+                self.add_source(source)
+
+    def add_source(self, source):
+        """
+        Add a source to the graph.  Sources are evaluated in the order they are added
+
+        Args:
+            source (obj): Source object that inherits from BaseSource
+        """
+        self.sources.append(_va(source, BaseSource))
+        # topology changed, so the arena and any compiled evaluator are stale
+        self.arena = None
+        self._eval = None
+
+    def build_arena(self):
+        """
+        Register the parameters of every model in the graph into a new ParamArena.  Call it again (or add a source)
+        after changing the loads of a source, since the arena only holds the parameters present when it was built
+
+        Returns:
+            arena (ParamArena): arena holding the parameters of this graph
+        """
+        arena = ParamArena()
+        for source in self.sources:
+            for param in source.params():
+                # derived parameters are evaluated from their root, so only the root needs a slot
+                arena.register(param.root if isinstance(param, _DerivedStatParam) else param)
+        self.arena = arena
+        self._eval = None   # evaluator indices refer to the previous arena
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Built parameter arena with %d parameters", arena.size)
+        return arena
+
+    def sample(self, out=None, rng=None):
+        """
+        Sample one Monte Carlo trial for every parameter of the graph, building the arena first if needed
+
+        Args:
+            out (np.ndarray): Optional float64 buffer of length self.arena.size to write the samples into
+            rng (np.random.Generator): Random generator to draw samples from.  Defaults to the calling thread's generator
+
+        Returns:
+            out (np.ndarray): Sampled values, indexed by the arena index of each parameter
+        """
+        if self.arena is None:
+            self.build_arena()
+        return self.arena.sample(out, rng)
+
+    def value(self, param, samples):
+        """
+        Get the value of a parameter of the graph within a trial.  Derived parameters are evaluated from the sample of
+        their root, so they stay correlated with it
+
+        Args:
+            param (StatParam, _DerivedStatParam): parameter registered in this graph
+            samples (np.ndarray): value of every parameter indexed by its index in self.arena (i.e. self.sample())
+
+        Returns:
+            val (float): value of the parameter in this trial
+        """
+        if self.arena is None:
+            self.build_arena()
+        if isinstance(param, _DerivedStatParam):
+            return samples[self.arena.index(param.root)] * param.scale + param.offset
+        return samples[self.arena.index(param)]
+
+    def compile(self):
+        """
+        Generate the efficiency evaluator for the current topology.  The generated function has the signature
+        eval(samples, currents, out) where 'samples' holds a value for every parameter indexed by its arena index
+        (i.e. self.arena.nom or self.sample()), 'currents' holds the load current of each source and the
+        efficiency of each source is written into 'out'
+
+        Returns:
+            eval (function): compiled evaluator
+        """
+        arena = self.build_arena() if self.arena is None else self.arena
+        namespace = {'_interp': np.interp}
+        lines = ["def _eval(samples, currents, out):"]
+        for k, source in enumerate(self.sources):
+            efficiency = getattr(source, 'efficiency', None)
+            if isinstance(source, LinearSource):
+                lines.append("    out[{0}] = currents[{0}] / (currents[{0}] + {1})".format(k, _param_expr(source.iq, arena)))
+            elif isinstance(efficiency, EfficiencyModel):
+                if efficiency._is_scalar:
+                    lines.append("    out[{}] = {!r}".format(k, efficiency.efficiency))
+                else:
+                    namespace['_i{}'.format(k)] = efficiency._i
+                    namespace['_eff{}'.format(k)] = efficiency._eff
+                    lines.append("    out[{0}] = _interp(currents[{0}], _i{0}, _eff{0})".format(k))
+            else:
+                raise TypeError("Source [{}-{}] has no efficiency model".format(source.id, source.name))
+        lines.append("    return out")
+
+        self._eval_src = "\n".join(lines)
+        exec(compile(self._eval_src, "<ModelGraph.compile>", "exec"), namespace)
+        self._eval = namespace['_eval']
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Compiled efficiency evaluator for %d sources", len(self.sources))
+        return self._eval
+
+    def calc_efficiency(self, samples, currents, out=None):
+        """
+        Evaluate the efficiency of every source, compiling the evaluator first if the topology changed
+
+        Args:
+            samples (np.ndarray): value of every parameter indexed by its index in self.arena
+            currents (np.ndarray): load current of each source in Amps
+            out (np.ndarray): Optional float64 buffer to write the efficiencies into
+
+        Returns:
+            out (np.ndarray): efficiency of each source in decimal form
+        """
+        if self._eval is None:
+            self.compile()
+        if out is None:
+            out = np.empty(len(self.sources), dtype=np.float64)
+        return self._eval(samples, currents, out)
 
 
 if __name__=="__main__":
@@ -0,0 +1,220 @@
+import threading
+import numpy as np
+
+# distribution codes stored in ParamArena.dist
+DIST_NONE = 0
+DIST_UNIFORM = 1
+DIST_NORMAL = 2
+DIST_CODES = {None: DIST_NONE, 'uniform': DIST_UNIFORM, 'normal': DIST_NORMAL}
+
+# parameter type codes stored in ParamArena.ptype
+PTYPE_NONE = 0
+PTYPE_VALUE = 1
+PTYPE_PERCENT = 2
+PTYPE_CODES = {None: PTYPE_NONE, 'value': PTYPE_VALUE, 'percent': PTYPE_PERCENT}
+
+# per-thread random generators (see get_rng)
+_tls = threading.local()
+
+
+def get_rng():
+    """
+    Get the random generator for the calling thread.  The generator is created on first use and cached, so sampling
+    doesn't go through the global (locked) legacy np.random state
+
+    Returns:
+        rng (np.random.Generator): random generator for this thread
+    """
+    rng = getattr(_tls, 'rng', None)
+    if rng is None:
+        rng = _tls.rng = np.random.default_rng()
+    return rng
+
+
+def seed_rng(seed):
+    """
+    Replace the random generator of the calling thread with a seeded one (i.e. for repeatable runs or per-worker streams)
+
+    Args:
+        seed (int, np.random.SeedSequence): seed for the generator
+
+    Returns:
+        rng (np.random.Generator): new random generator for this thread
+    """
+    rng = _tls.rng = np.random.default_rng(seed)
+    return rng
+
+
+def spawn_seeds(n_workers:int, seed:int=None):
+    """
+    Create independent seed sequences for parallel Monte Carlo workers.  Each worker should pass its seed to seed_rng()
+    so the random streams are statistically independent
+
+    Args:
+        n_workers (int): number of workers
+        seed (int): base seed.  If None, fresh entropy is used
+
+    Returns:
+        seeds (list): list of np.random.SeedSequence, one per worker
+    """
+    return np.random.SeedSequence(seed).spawn(n_workers)
+
+
+class ParamArena():
+    """
+    Structure-of-Arrays storage for the StatParam statistics of one model graph.  Parameters are registered when the
+    graph is built, so a Monte Carlo trial can sample every parameter of the graph with a handful of vectorized NumPy calls.
+    """
+    def __init__(self, capacity:int=64):
+        """
+        Args:
+            capacity (int): Initial number of parameters to allocate room for.  Storage grows automatically
+        """
+        self.size = 0
+        self._index = dict()    # registered parameter -> idx
+        self._nom = np.zeros(capacity, dtype=np.float64)
+        self._low = np.full(capacity, np.nan, dtype=np.float64)
+        self._high = np.full(capacity, np.nan, dtype=np.float64)
+        self._dist = np.zeros(capacity, dtype=np.uint8)
+        self._ptype = np.zeros(capacity, dtype=np.uint8)
+
+    @property
+    def nom(self):
+        return self._nom[:self.size]
+
+    @property
+    def low(self):
+        return self._low[:self.size]
+
+    @property
+    def high(self):
+        return self._high[:self.size]
+
+    @property
+    def dist(self):
+        return self._dist[:self.size]
+
+    @property
+    def ptype(self):
+        return self._ptype[:self.size]
+
+    def _grow(self):
+        """
+        Double the capacity of every column
+        """
+        capacity = max(1, 2 * len(self._nom))
+        for attr, fill in (('_nom', 0.0), ('_low', np.nan), ('_high', np.nan), ('_dist', 0), ('_ptype', 0)):
+            old = getattr(self, attr)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, attr, new)
+
+    def add(self, nom_value:[int, float], low_val:[int, float]=None, high_val:[int, float]=None, param_dist:str=None, param_type:str=None):
+        """
+        Append a parameter to the arena
+
+        Args:
+            nom_value (int, float): Nominal value of the parameter
+            low_val (int, float): Lower value as represented by param_type
+            high_val (int, float): Upper value as represented by param_type
+            param_dist (str): Type of statistical distribution ['uniform', 'normal']
+            param_type (str): Type of statistical parameter ['value', 'percent']
+
+        Returns:
+            idx (int): index of the parameter in the arena
+        """
+        if self.size == len(self._nom):
+            self._grow()
+        idx = self.size
+        self._nom[idx] = nom_value
+        self._low[idx] = np.nan if low_val is None else low_val
+        self._high[idx] = np.nan if high_val is None else high_val
+        # names are validated case-insensitively, so look up the lowercase form
+        self._dist[idx] = DIST_CODES[None if param_dist is None else param_dist.lower()]
+        self._ptype[idx] = PTYPE_CODES[None if param_type is None else param_type.lower()]
+        self.size += 1
+        return idx
+
+    def register(self, param):
+        """
+        Add the statistics of a parameter to the arena.  Registering the same parameter again returns its existing index
+
+        Args:
+            param (StatParam): parameter to register
+
+        Returns:
+            idx (int): index of the parameter in the arena
+        """
+        idx = self._index.get(param)
+        if idx is None:
+            idx = self._index[param] = self.add(param.nom_value, param.low_val, param.high_val, param.param_dist, param.param_type)
+        return idx
+
+    def index(self, param):
+        """
+        Get the index of a registered parameter
+
+        Args:
+            param (StatParam): registered parameter
+
+        Returns:
+            idx (int): index of the parameter in the arena
+        """
+        try:
+            return self._index[param]
+        except KeyError:
+            raise KeyError("Parameter ({}) isn't registered in this arena".format(param.name)) from None
+
+    def sample(self, out=None, rng=None):
+        """
+        Sample one Monte Carlo trial for every parameter in the arena
+
+        Args:
+            out (np.ndarray): Optional float64 buffer of length self.size to write the samples into
+            rng (np.random.Generator): Random generator to draw samples from.  Defaults to the calling thread's generator
+
+        Returns:
+            out (np.ndarray): Sampled values, indexed by parameter idx
+        """
+        if out is None:
+            out = np.empty(self.size, dtype=np.float64)
+        return sample_trial(self.nom, self.low, self.high, self.dist, self.ptype, out, rng)
+
+
+def sample_trial(nom, low, high, dist, ptype, out, rng=None):
+    """
+    Vectorized Monte Carlo sample of a set of parameters stored as parallel arrays.
+
+    'value' bounds are absolute limits while 'percent' bounds are the percent deviation below/above nominal.
+    Uniform parameters are drawn between the bounds and normal parameters are centered on the nominal value with the
+    bounds spanning +/- 3 sigma.  Parameters without a distribution or bounds keep their nominal value.
+
+    Args:
+        nom (np.ndarray): nominal values
+        low (np.ndarray): lower bounds as represented by ptype (NaN if undefined)
+        high (np.ndarray): upper bounds as represented by ptype (NaN if undefined)
+        dist (np.ndarray): distribution codes (DIST_*)
+        ptype (np.ndarray): parameter type codes (PTYPE_*)
+        out (np.ndarray): float64 buffer to write the samples into
+        rng (np.random.Generator): Random generator to draw samples from.  Defaults to the calling thread's generator
+
+    Returns:
+        out (np.ndarray): Sampled values
+    """
+    if rng is None:
+        rng = get_rng()
+
+    # percent deviation is taken from the magnitude of nominal, so negative rails still have lo <= hi
+    percent = ptype == PTYPE_PERCENT
+    mag = np.abs(nom)
+    lo = np.where(percent, nom - mag * (low / 100.0), low)
+    hi = np.where(percent, nom + mag * (high / 100.0), high)
+    bounded = ~(np.isnan(lo) | np.isnan(hi))
+
+    out[:] = nom
+    uniform = bounded & (dist == DIST_UNIFORM)
+    out[uniform] = rng.uniform(lo[uniform], hi[uniform])
+    normal = bounded & (dist == DIST_NORMAL)
+    out[normal] = rng.normal(nom[normal], (hi[normal] - lo[normal]) / 6.0)
+    return out
+
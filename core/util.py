@@ -1,41 +1,146 @@
+import atexit
+import functools
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 # Logger levels
 LOG_LEVEL = logging.DEBUG
 CONSOLE_LEVEL = logging.INFO
 
+# loggers are looked up once at import instead of on every call
+_VALIDATE_ARG_LOGGER = logging.getLogger("validate_arg")
+
+# only immutable values are memoized by validate_arg, so the cache never holds on to model objects
+_CACHEABLE_TYPES = frozenset((str, int, float, bool))
+
+# argument kinds for value validation (see _arg_kind)
+_KIND_STR = 1
+_KIND_NUM = 2
+_ARG_KINDS = {str: _KIND_STR, int: _KIND_NUM, float: _KIND_NUM}
+
+# shared log formatters
+# the file format uses the raw epoch timestamp and no field padding, so records skip strftime and padding work
+_FILE_FMT = logging.Formatter('%(created).3f %(threadName)s %(name)s %(levelname)s %(message)s')
+_CONSOLE_FMT = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')     # simpler format for console use
+
+# background listener that writes queued log records, the root handler that feeds it and the log file it writes to (see init_logger)
+_LISTENER = None
+_QUEUE_HANDLER = None
+_LOG_PATH = None
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that writes through a large file buffer.  The stock handler flushes after every record (one write()
+    syscall per line); this one only flushes for records at flush_level or higher and when the handler is closed
+    """
+    def __init__(self, filename, mode='a', encoding=None, buffer_size=65536, flush_level=logging.WARNING):
+        """
+        Args:
+            filename (str): full path to the log file
+            mode (str): file open mode
+            encoding (str): file encoding
+            buffer_size (int): size of the file buffer in bytes
+            flush_level (int): records at this level or higher are flushed to disk immediately
+        """
+        self.buffer_size = buffer_size
+        self.flush_level = flush_level
+        super().__init__(filename, mode, encoding)
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size, encoding=self.encoding)
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= self.flush_level:
+                self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
 def init_logger(fullpath):
     """
-    Setup the logger object
+    Setup the logger object.  Log records are put on a queue by the root logger and written to the log file and console
+    by a background listener thread, so logging calls don't block on file/console I/O.  Calling this again with the same
+    log file is a no-op; a different log file replaces the previous configuration
 
     Args:
         fullpath (str): full path to the log file
     """
-    logging.basicConfig(level=LOG_LEVEL,
-                        format='%(asctime)s %(threadName)-10s %(name)-20s %(levelname)-8s %(message)s',
-                        datefmt='%m-%d-%y %H:%M:%S',
-                        filename=fullpath,
-                        filemode='w')
+    global _LISTENER, _QUEUE_HANDLER, _LOG_PATH
+    fullpath = os.path.abspath(fullpath)
+    if _LISTENER is not None and fullpath == _LOG_PATH:
+        return
+    shutdown_logger()   # stop the listener from a previous init
+
+    # file handler writes everything at LOG_LEVEL or higher
+    file_handler = BufferedFileHandler(fullpath, mode='w')
+    file_handler.setLevel(LOG_LEVEL)
+    file_handler.setFormatter(_FILE_FMT)
 
     # define a Handler which writes INFO messages or higher to the sys.stderr
     console = logging.StreamHandler()
     console.setLevel(CONSOLE_LEVEL)
-    # set a format which is simpler for console use
-    formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
-    # tell the handler to use this format
-    console.setFormatter(formatter)
-    # add the handler to the root logger
-    logging.getLogger('').addHandler(console)
+    console.setFormatter(_CONSOLE_FMT)
+
+    # the root logger only enqueues records, the listener thread does the actual writes
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger('')
+    root.handlers.clear()
+    root.setLevel(LOG_LEVEL)
+    _QUEUE_HANDLER = QueueHandler(log_queue)
+    root.addHandler(_QUEUE_HANDLER)
+    _LISTENER = QueueListener(log_queue, file_handler, console, respect_handler_level=True)
+    _LISTENER.start()
+    _LOG_PATH = fullpath
     logging.debug("Creating log file")
 
-def validate_string(arg, values:[str,list], strict=True):
+def shutdown_logger():
+    """
+    Stop the log listener thread started by init_logger() and remove its queue handler from the root logger.  Any queued
+    records are written out before returning
+    """
+    global _LISTENER, _QUEUE_HANDLER, _LOG_PATH
+    if _QUEUE_HANDLER is not None:
+        # detach first so no records are queued after the listener stops
+        logging.getLogger('').removeHandler(_QUEUE_HANDLER)
+        _QUEUE_HANDLER = None
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        for handler in _LISTENER.handlers:
+            handler.close()
+        _LISTENER = None
+        _LOG_PATH = None
+
+# make sure queued records are flushed on exit
+atexit.register(shutdown_logger)
+
+@functools.lru_cache(maxsize=256)
+def _lowercase_set(values:[tuple, frozenset]):
+    """
+    Cached lowercase set of valid string values for validate_string()
+    """
+    return frozenset(s.lower() for s in values)
+
+@functools.lru_cache(maxsize=256)
+def _frozen_set(values:tuple):
+    """
+    Cached set of valid string values for validate_string()
+    """
+    return frozenset(values)
+
+def validate_string(arg, values:[str,list,frozenset], strict=True):
     """
     Helper function to validate an argument against an acceptable string or list of strings. This function
-    is meant to be passed into validate_arg() as a callback function
+    is meant to be passed into validate_arg() as a callback function.  For hot paths, pass a module-level frozenset
+    of valid strings so no container is built per call (i.e. _VALID_MODES = frozenset(('nom', 'mc')))
     
     Args:
         arg (str): argument to validate
-        values (str, list): string or list of valid strings
+        values (str, list, frozenset): string or collection of valid strings
         strict (bool): If True, direct compare is made, otherwise lowercase compare is made
 
     Returns:
@@ -44,26 +149,44 @@ def validate_string(arg, values:[str,list], strict=True):
     Raises:
         ValueError
     """
-    if type(values) is str:
-        values = [values]   # cast to list for comparison
-    
-    if strict is False:
-        # do a lowercase compare on each element in the list
-        values = [s.lower() for s in values]
-        arg = arg.lower()
+    if strict and isinstance(values, str):
+        # single valid string with a direct compare, no container needed
+        if arg != values:
+            raise ValueError(f"{arg} is invalid value. Acceptable values are {[values]}")
+        return
+
+    if isinstance(values, (set, frozenset)):
+        if strict:
+            valid = values     # already a set, test membership directly
+        else:
+            # do a lowercase compare against the lowercase set of valid values
+            arg = arg.lower()
+            valid = _lowercase_set(values if isinstance(values, frozenset) else frozenset(values))
+    else:
+        if type(values) is str:
+            values = (values,)   # cast to tuple for comparison
+        else:
+            values = tuple(values)
 
-    if arg not in values:
-        raise ValueError("{} is invalid value. Acceptable values are {}".format(arg, values))
+        if strict is False:
+            # do a lowercase compare against the lowercase set of valid values
+            arg = arg.lower()
+            valid = _lowercase_set(values)
+        else:
+            valid = _frozen_set(values)
+
+    if arg not in valid:
+        raise ValueError(f"{arg} is invalid value. Acceptable values are {list(values)}")
 
 
-def validate_number(arg:[int,float], range:list):
+def validate_number(arg:[int,float], rng:list):
     """
     Helper function to validate a number between a valid range of values.  This function is meant to be
     passed into validate_arg as a callback function
 
     Args:
         arg (int, float): number to validate
-        range (list): inclusive bounds on valid range [lower, upper]
+        rng (list): inclusive bounds on valid range [lower, upper]
 
     Returns:
         None
@@ -71,9 +194,78 @@ def validate_number(arg:[int,float], range:list):
     Raises:
         ValueError
     """
-    print(range)
-    if arg < range[0] or arg > range[1]:
-        raise ValueError("Value ({}) must be in the range [{}, {}]".format(arg, range[0],range[1]))
+    lo = rng[0]
+    hi = rng[1]
+    if not lo <= arg <= hi:
+        raise ValueError(f"Value ({arg}) must be in the range [{lo}, {hi}]")
+
+def _arg_kind(arg):
+    """
+    Classify an argument for value validation.  Common exact types are a single dict lookup, subclasses fall back
+    to isinstance.  bool is never treated as a number
+
+    Args:
+        arg (obj): argument to classify
+
+    Returns:
+        kind (int): _KIND_STR, _KIND_NUM or None if the argument has no value check
+    """
+    kind = _ARG_KINDS.get(type(arg))
+    if kind is None:
+        if isinstance(arg, str):
+            kind = _KIND_STR
+        elif isinstance(arg, (int, float)) and not isinstance(arg, bool):
+            kind = _KIND_NUM
+    return kind
+
+def _check_arg(arg, expected_type:[type, tuple], valid_values, strict):
+    """
+    Type and value checks behind validate_arg()
+
+    Args:
+        arg (obj): argument to be validated
+        expected_type (type, tuple): Object type or tuple of types to check against
+        valid_values (str, tuple): values used to validate the argument
+        strict (bool): use strict enforcement of string validation (if applicable)
+
+    Raises:
+        TypeError: Raised if arg type does not match expected_type
+        ValueError: If arg value is not in expected range
+    """
+    # exact type match is a single pointer compare, isinstance covers type tuples and subclasses
+    if type(arg) is not expected_type and not isinstance(arg, expected_type):
+        expected = list(expected_type) if isinstance(expected_type, tuple) else [expected_type]
+        raise TypeError(f"Invalid argument type ({type(arg)}) must be ({expected})")
+    # bool subclasses int, but True/False aren't accepted when int is the only expected type they match
+    if type(arg) is bool and expected_type is not bool:
+        expected = list(expected_type) if isinstance(expected_type, tuple) else [expected_type]
+        if all(t is int or not isinstance(arg, t) for t in expected):
+            raise TypeError(f"Invalid argument type ({type(arg)}) must be ({expected})")
+
+    # now, validate the argument value using the appropriate function if valid values were supplied
+    if valid_values is not None:
+        kind = _arg_kind(arg)
+        if kind == _KIND_STR:
+            validate_string(arg, valid_values, strict)
+        elif kind == _KIND_NUM:
+            validate_number(arg, valid_values)
+
+@functools.lru_cache(maxsize=1024)
+def _check_arg_cached(arg_type, arg, expected_type:[type, tuple], valid_values, strict):
+    """
+    Memoized _check_arg() for repeated validations of the same immutable value.  Failed checks raise and are never cached
+    """
+    _check_arg(arg, expected_type, valid_values, strict)
+
+def _is_hashable(obj):
+    """
+    Check whether obj can be used in a cache key
+    """
+    try:
+        hash(obj)
+    except TypeError:
+        return False
+    return True
 
 def validate_arg(arg, expected_type, valid_values=None, optional=False, default=None, strict=False):
     """
@@ -81,9 +273,9 @@ def validate_arg(arg, expected_type, valid_values=None, optional=False, default=
 
     Args:
         arg (obj): argument to be validated.  Can be any object type
-        expected_type (obj): Object type to check against
-        optional (bool): If True, raise exception if arg is None Type.
-        valid_values (str, list): values used to validate the argument
+        expected_type (obj, list): Object type (or list of types) to check against.  Subclasses of the type(s) are accepted
+        optional (bool): If True, arg may be None Type (None or default is returned).  Otherwise None fails the type check
+        valid_values (str, list, frozenset): values used to validate the argument
         default (obj): Default value to use if arg is None Type.  default type must match expected_type or exception will be thrown
         strict (bool): use strict enforcement of string validation (if applicable)
 
@@ -94,33 +286,113 @@ def validate_arg(arg, expected_type, valid_values=None, optional=False, default=
         TypeError: Raised if arg type does not match expected_type
         ValueError: If arg value is not in expected range
     """
-    logger = logging.getLogger(validate_arg.__qualname__)
-    # if argument is optional and it's None, check if default type was specified
-    if optional is True and arg is None:
+    if not __debug__:
+        # validation is skipped entirely under 'python -O', only optional defaults are resolved
+        return default if optional is True and arg is None else arg
+
+    logger = _VALIDATE_ARG_LOGGER
+    debug = logger.isEnabledFor(logging.DEBUG)
+    # an optional None argument returns straight away, before any type/value work, unless a default was specified.
+    # arg is checked first since most arguments aren't None.  The default itself is still validated below
+    if arg is None and optional is True:
         if default is None:
-            logger.debug("Ignoring NoneType optional argument")
+            if debug:
+                logger.debug("Ignoring NoneType optional argument")
             return None
-        else:
+        if debug:
             logger.debug("Using default argument")
-            arg = default 
+        arg = default
 
-    # check argument type against expected type
-    if type(expected_type) is not list:
-        expected_type = [expected_type]     # format expected type into a list for checking
+    # lists aren't hashable, so convert the type and value specs to tuples for the validation cache
+    if isinstance(expected_type, list):
+        expected_type = tuple(expected_type)
+    if isinstance(valid_values, list):
+        valid_values = tuple(valid_values)
 
-    if type(arg) not in expected_type:
-        raise TypeError("Invalid argument type ({}) must be ({})".format(type(arg), expected_type))
-    
-    # now, validate the argument value using the appropriate function if valid values were supplied
-    if valid_values is not None:
-        if type(arg) is str:
-            validate_string(arg, valid_values, strict)
-        elif type(arg) is int or float:
-            validate_number(arg, valid_values)
+    arg_type = type(arg)
+    if arg_type in _CACHEABLE_TYPES and _is_hashable(valid_values):
+        # the arg type is part of the key since 1, 1.0 and True hash (and compare) the same
+        _check_arg_cached(arg_type, arg, expected_type, valid_values, strict)
+    else:
+        _check_arg(arg, expected_type, valid_values, strict)
 
-    logger.debug("Validated arg: {}".format(arg))
+    if debug:
+        logger.debug("Validated arg: %s", arg)
     return arg
 
+def make_validator(expected_type, valid_values=None, strict=False):
+    """
+    Build a validator specialized to one (expected_type, valid_values, strict) shape.  The type tuple and the set of
+    valid values are prepared once, so each call is an isinstance check plus a set membership (or range) test.  Meant
+    to be created at import time for validations that repeat the same shape, i.e. _validate_mode = make_validator(str, _VALID_MODES).
+    Like validate_arg(), the checks are skipped under 'python -O'
+
+    Args:
+        expected_type (obj, list): Object type (or list of types) to check against.  Subclasses of the type(s) are accepted
+        valid_values (str, list, frozenset): valid string(s), a set of valid values, or inclusive numeric bounds [lower, upper]
+        strict (bool): use strict enforcement of string validation (if applicable)
+
+    Returns:
+        validator (function): validator(arg) that returns arg if the checks pass and raises TypeError/ValueError otherwise
+    """
+    if not __debug__:
+        def validator(arg):
+            return arg
+        return validator
+
+    types = tuple(expected_type) if isinstance(expected_type, (list, tuple)) else (expected_type,)
+    expected = list(types)
+    # same bool rule as _check_arg(): bool only passes if a type other than int accepts it
+    reject_bool = all(t is int or not issubclass(bool, t) for t in types)
+
+    def check_type(arg):
+        if not isinstance(arg, types) or (reject_bool and type(arg) is bool):
+            raise TypeError(f"Invalid argument type ({type(arg)}) must be ({expected})")
+
+    if valid_values is None:
+        def validator(arg):
+            check_type(arg)
+            return arg
+        return validator
+
+    if isinstance(valid_values, str):
+        valid_values = (valid_values,)
+
+    if all(isinstance(v, str) for v in valid_values):
+        valid = frozenset(valid_values) if strict else frozenset(v.lower() for v in valid_values)
+        shown = list(valid_values)
+
+        def validator(arg):
+            check_type(arg)
+            if isinstance(arg, str):
+                value = arg if strict else arg.lower()
+                if value not in valid:
+                    raise ValueError(f"{value} is invalid value. Acceptable values are {shown}")
+            return arg
+        return validator
+
+    if isinstance(valid_values, (set, frozenset)):
+        # a set of non-string values is an allow-list rather than a range
+        valid = frozenset(valid_values)
+        shown = list(valid_values)
+
+        def validator(arg):
+            check_type(arg)
+            if arg not in valid:
+                raise ValueError(f"{arg} is invalid value. Acceptable values are {shown}")
+            return arg
+        return validator
+
+    lo = valid_values[0]
+    hi = valid_values[1]
+
+    def validator(arg):
+        check_type(arg)
+        if _arg_kind(arg) == _KIND_NUM and not lo <= arg <= hi:
+            raise ValueError(f"Value ({arg}) must be in the range [{lo}, {hi}]")
+        return arg
+    return validator
+
 if __name__=="__main__":
     validate_arg("hi", [str], "Hi", strict=False)
     validate_arg("hi", str, ["hi", "bye"], strict=False)